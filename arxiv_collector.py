@@ -8,26 +8,91 @@ Handles rate limiting, deduplication, and resume capability.
 import sqlite3
 import urllib.request
 import urllib.parse
-import feedparser
+import urllib.error
+import gzip
+import contextlib
+import xml.etree.ElementTree as ElementTree
 import json
 import time
 import argparse
 import logging
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from datetime import datetime
 import sys
 import signal
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+
+# Atom namespaces used by the arXiv API
+ATOM_NS = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom',
+    'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
+}
+ATOM_ENTRY_TAG = '{http://www.w3.org/2005/Atom}entry'
+TOTAL_RESULTS_TAG = '{http://a9.com/-/spec/opensearch/1.1/}totalResults'
+
+# HTTP statuses that mean "slow down / try again later"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Request headers sent to arXiv; Atom/OAI XML shrinks several-fold under gzip
+REQUEST_HEADERS = {
+    'Accept-Encoding': 'gzip',
+    'User-Agent': 'aitopicscs-arxiv-collector/1.0 (+https://github.com/matthiasroder/aitopicscs)'
+}
+
+
+def dumps_json(value) -> str:
+    """Serialize a value to a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+class Paper(NamedTuple):
+    """A papers row; fields are in INSERT_PAPER_SQL column order."""
+    arxiv_id: str
+    title: str
+    authors: str
+    abstract: str
+    categories: str
+    published_date: str
+    updated_date: str
+    pdf_url: str
+    entry_url: str
+
 
 class ArxivCollector:
-    def __init__(self, db_path: str = "arxiv_papers.db", delay: float = 3.0):
+    INSERT_PAPER_SQL = """
+        INSERT OR IGNORE INTO papers 
+        (arxiv_id, title, authors, abstract, categories, 
+         published_date, updated_date, pdf_url, entry_url)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    INSERT_LINK_SQL = """
+        INSERT OR IGNORE INTO paper_keywords (paper_id, keyword_id)
+        VALUES (?, ?)
+    """
+    
+    def __init__(self, db_path: str = "arxiv_papers.db", delay: float = 3.0, workers: int = 4,
+                 local: bool = False):
         """Initialize the collector with database and API settings."""
         self.db_path = db_path
-        self.delay = delay  # Seconds between requests
+        self.delay = delay  # Minimum seconds between requests
+        self.workers = workers  # Keywords processed concurrently
+        self.local = local  # Match keywords against stored papers instead of the API
         self.base_url = "http://export.arxiv.org/api/query"
         self.batch_size = 500  # Results per request
         self.max_results_per_keyword = 2000  # API limit
+        self.max_retries = 3  # Retries per request on throttling/server errors
         
         # Setup logging
         logging.basicConfig(
@@ -40,6 +105,28 @@ class ArxivCollector:
         )
         self.logger = logging.getLogger(__name__)
         
+        # One connection for the collector's lifetime; DML statements open
+        # BEGIN IMMEDIATE transactions that `with self.conn:` commits
+        self.conn = sqlite3.connect(self.db_path, isolation_level="IMMEDIATE", check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+        atexit.register(self.close)
+        self._db_lock = threading.Lock()  # Serializes transactions on the shared connection
+        
+        # Request throttling shared by all worker threads. The interval
+        # backs off on 429/5xx and eases back down to `delay` on success.
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self._paused_until = 0.0  # Set by back_off; slots reserved before it are re-queued
+        self._min_delay = delay
+        self._max_delay = 120.0
+        self._cur_delay = delay
+        
+        # IDs of papers already stored; their entries are only linked, not re-serialized
+        self.known_ids = set()
+        
         # Setup database
         self.setup_database()
         
@@ -53,12 +140,18 @@ class ArxivCollector:
         self.logger.info("Shutdown signal received. Finishing current operation...")
         self.shutdown_requested = True
     
+    def close(self):
+        """Close the database connection."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+    
     def setup_database(self):
-        """Create database tables and indexes."""
+        """Create database tables; indexes are created separately by create_indexes()."""
         self.logger.info(f"Setting up database: {self.db_path}")
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
             
             # Papers table
             cursor.execute("""
@@ -100,15 +193,21 @@ class ArxivCollector:
                     FOREIGN KEY (keyword_id) REFERENCES keywords (id)
                 )
             """)
-            
-            # Create indexes for performance
+    
+    def create_indexes(self):
+        """
+        Create secondary indexes (no-op for indexes that already exist).
+        
+        Bulk loads call this after inserting, so SQLite builds each index
+        once from sorted data instead of updating it on every insert.
+        """
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_papers_categories ON papers (categories)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_papers_published ON papers (published_date)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_keywords_status ON keywords (status)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_paper_keywords_paper ON paper_keywords (paper_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_paper_keywords_keyword ON paper_keywords (keyword_id)")
-            
-            conn.commit()
     
     def load_keywords(self, keywords_file: str):
         """Load keywords from file into database."""
@@ -117,24 +216,90 @@ class ArxivCollector:
         with open(keywords_file, 'r', encoding='utf-8') as f:
             keywords = [line.strip() for line in f if line.strip()]
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock, self.conn:
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO keywords (keyword) VALUES (?)
+            """, [(keyword,) for keyword in keywords])
+        
+        self.logger.info(f"Loaded {len(keywords)} keywords into database")
+        return len(keywords)
+    
+    def wait_for_request_slot(self):
+        """Block until the next API request may be sent (shared by all workers)."""
+        while True:
+            # Reserve a slot under the lock, but sleep outside it so other
+            # workers can reserve slots or back off in the meantime
+            with self._rate_lock:
+                now = time.monotonic()
+                slot = max(now, self._next_request_at, self._paused_until)
+                self._next_request_at = slot + self._cur_delay
             
-            for keyword in keywords:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO keywords (keyword) VALUES (?)
-                """, (keyword,))
+            if slot > now:
+                self.logger.debug(f"Waiting {slot - now:.1f} seconds...")
+                time.sleep(slot - now)
             
-            conn.commit()
+            # A back-off that started while we slept cancels the reserved slot
+            with self._rate_lock:
+                if time.monotonic() >= self._paused_until:
+                    return
+    
+    def record_request_success(self):
+        """Ease the request interval back towards the configured delay."""
+        with self._rate_lock:
+            self._cur_delay = max(self._min_delay, self._cur_delay * 0.9)
+    
+    def back_off(self, retry_after: Optional[str] = None) -> float:
+        """Double the request interval and pause all workers; returns the pause in seconds."""
+        with self._rate_lock:
+            self._cur_delay = min(self._max_delay, self._cur_delay * 2)
+            pause = self._cur_delay
+            if retry_after:
+                try:
+                    pause = max(pause, float(retry_after))
+                except ValueError:
+                    pass  # HTTP-date form; the doubled interval is used instead
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._next_request_at = max(self._next_request_at, self._paused_until)
+            return pause
+    
+    @contextlib.contextmanager
+    def open_url(self, url: str, description: str):
+        """
+        Open an arXiv URL through the shared rate gate, retrying when throttled.
+        
+        Yields a readable stream of the response body, decompressed on the fly
+        if the server sent it gzip-encoded.
+        """
+        request = urllib.request.Request(url, headers=REQUEST_HEADERS)
+        
+        for attempt in range(self.max_retries + 1):
+            self.wait_for_request_slot()
+            self.logger.debug(f"Querying: {url}")
             
-        self.logger.info(f"Loaded {len(keywords)} keywords into database")
-        return len(keywords)
+            try:
+                response = urllib.request.urlopen(request, timeout=30)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    raise
+                pause = self.back_off(e.headers.get('Retry-After'))
+                self.logger.warning(f"arXiv returned {e.code} for {description}, retrying in {pause:.1f} seconds")
+                continue
+            
+            self.record_request_success()
+            break
+        
+        with response:
+            if response.headers.get('Content-Encoding') == 'gzip':
+                with gzip.GzipFile(fileobj=response) as body:
+                    yield body
+            else:
+                yield response
     
     def build_query_url(self, keyword: str, start: int = 0, max_results: int = None) -> str:
         """Build arXiv API query URL for a keyword."""
         if max_results is None:
             max_results = self.batch_size
-            
+        
         # Use comprehensive search across all fields
         search_query = f'all:"{keyword}"'
         
@@ -149,92 +314,119 @@ class ArxivCollector:
         query_string = urllib.parse.urlencode(params)
         return f"{self.base_url}?{query_string}"
     
-    def query_arxiv(self, keyword: str, start: int = 0, max_results: int = None) -> Tuple[List[Dict], int]:
-        """Query arXiv API for a specific keyword."""
+    def query_arxiv(self, keyword: str, start: int = 0, max_results: int = None) -> Tuple[List[Paper], List[str], int]:
+        """
+        Query arXiv API for a specific keyword.
+        
+        Returns full records only for papers not already stored, plus the IDs
+        of every paper in the batch (for linking) and the total result count.
+        """
         url = self.build_query_url(keyword, start, max_results)
         
         try:
-            self.logger.debug(f"Querying: {url}")
-            response = urllib.request.urlopen(url, timeout=30)
-            feed = feedparser.parse(response.read())
-            
-            # Check for errors in feed
-            if hasattr(feed, 'status') and feed.status >= 400:
-                raise Exception(f"API returned status {feed.status}")
-            
             papers = []
-            total_results = int(feed.feed.get('opensearch_totalresults', 0))
+            arxiv_ids = []
+            total_results = 0
             
-            for entry in feed.entries:
-                # Extract arXiv ID from entry ID
-                arxiv_id = entry.id.split('/')[-1]
-                if 'v' in arxiv_id:
-                    arxiv_id = arxiv_id.split('v')[0]  # Remove version number
-                
-                # Extract authors
-                authors = [author.name for author in getattr(entry, 'authors', [])]
-                
-                # Extract categories
-                categories = []
-                if hasattr(entry, 'arxiv_primary_category'):
-                    categories.append(entry.arxiv_primary_category.term)
-                if hasattr(entry, 'tags'):
-                    categories.extend([tag.term for tag in entry.tags if tag.term not in categories])
-                
-                paper = {
-                    'arxiv_id': arxiv_id,
-                    'title': entry.title.replace('\n', ' ').strip(),
-                    'authors': json.dumps(authors),
-                    'abstract': entry.summary.replace('\n', ' ').strip(),
-                    'categories': json.dumps(categories),
-                    'published_date': getattr(entry, 'published', ''),
-                    'updated_date': getattr(entry, 'updated', ''),
-                    'pdf_url': next((link.href for link in entry.links if link.type == 'application/pdf'), ''),
-                    'entry_url': entry.link
-                }
-                
-                papers.append(paper)
-            
-            return papers, total_results
+            # Stream-parse the Atom feed straight off the socket
+            with self.open_url(url, f"'{keyword}'") as response:
+                for _, element in ElementTree.iterparse(response):
+                    if element.tag == ATOM_ENTRY_TAG:
+                        arxiv_id = self.parse_entry_id(element)
+                        arxiv_ids.append(arxiv_id)
+                        # Known papers only need linking, so skip converting them
+                        if arxiv_id not in self.known_ids:
+                            papers.append(self.parse_entry(element, arxiv_id))
+                        element.clear()  # Release the parsed entry
+                    elif element.tag == TOTAL_RESULTS_TAG:
+                        total_results = int(element.text or 0)
             
+            return papers, arxiv_ids, total_results
+        
         except Exception as e:
             self.logger.error(f"Error querying arXiv for '{keyword}': {e}")
             raise
     
-    def store_papers(self, papers: List[Dict], keyword_id: int) -> int:
-        """Store papers in database with deduplication."""
-        stored_count = 0
+    def parse_entry_id(self, entry: ElementTree.Element) -> str:
+        """Extract the unversioned arXiv ID from an Atom <entry> element."""
+        arxiv_id = entry.findtext('atom:id', '', ATOM_NS).split('/')[-1]
+        if 'v' in arxiv_id:
+            arxiv_id = arxiv_id.split('v')[0]  # Remove version number
+        return arxiv_id
+    
+    def parse_entry(self, entry: ElementTree.Element, arxiv_id: str) -> Paper:
+        """Convert an Atom <entry> element into a paper record."""
+        # Extract authors
+        authors = [author.findtext('atom:name', '', ATOM_NS) for author in entry.iterfind('atom:author', ATOM_NS)]
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        # Extract categories, primary category first
+        categories = []
+        primary_category = entry.find('arxiv:primary_category', ATOM_NS)
+        if primary_category is not None:
+            categories.append(primary_category.get('term'))
+        for tag in entry.iterfind('atom:category', ATOM_NS):
+            if tag.get('term') not in categories:
+                categories.append(tag.get('term'))
+        
+        links = entry.findall('atom:link', ATOM_NS)
+        
+        return Paper(
+            arxiv_id=arxiv_id,
+            title=entry.findtext('atom:title', '', ATOM_NS).replace('\n', ' ').strip(),
+            authors=dumps_json(authors),
+            abstract=entry.findtext('atom:summary', '', ATOM_NS).replace('\n', ' ').strip(),
+            categories=dumps_json(categories),
+            published_date=entry.findtext('atom:published', '', ATOM_NS),
+            updated_date=entry.findtext('atom:updated', '', ATOM_NS),
+            pdf_url=next((link.get('href') for link in links if link.get('type') == 'application/pdf'), ''),
+            entry_url=next((link.get('href') for link in links if link.get('rel', 'alternate') == 'alternate'), '')
+        )
+    
+    def store_papers(self, papers: List[Paper], arxiv_ids: List[str], keyword_id: int,
+                     progress: Optional[Tuple[int, int]] = None) -> int:
+        """
+        Store new papers and link every paper in the batch to the keyword.
+        
+        If progress is given as (total_results, processed_results), the keyword's
+        progress is updated in the same transaction as the batch.
+        """
+        # Collapse duplicate IDs within the batch, keeping the first record
+        unique_papers = {}
+        for paper in papers:
+            unique_papers.setdefault(paper.arxiv_id, paper)
+        arxiv_ids = list(dict.fromkeys(arxiv_ids))
+        
+        if not arxiv_ids and progress is None:
+            return 0
+        
+        # One transaction per batch: a single commit instead of one per row
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
             
-            for paper in papers:
-                try:
-                    # Insert paper (ignore if already exists)
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO papers 
-                        (arxiv_id, title, authors, abstract, categories, 
-                         published_date, updated_date, pdf_url, entry_url)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        paper['arxiv_id'], paper['title'], paper['authors'],
-                        paper['abstract'], paper['categories'], paper['published_date'],
-                        paper['updated_date'], paper['pdf_url'], paper['entry_url']
-                    ))
-                    
-                    # Link paper to keyword (ignore if already linked)
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO paper_keywords (paper_id, keyword_id)
-                        VALUES (?, ?)
-                    """, (paper['arxiv_id'], keyword_id))
-                    
-                    if cursor.rowcount > 0:
-                        stored_count += 1
-                        
-                except sqlite3.Error as e:
-                    self.logger.error(f"Error storing paper {paper['arxiv_id']}: {e}")
+            # Another worker may have stored some of these since they were parsed
+            placeholders = ','.join('?' * len(unique_papers))
+            known_ids = {row[0] for row in cursor.execute(
+                f"SELECT arxiv_id FROM papers WHERE arxiv_id IN ({placeholders})", list(unique_papers)
+            )}
+            # Paper rows are already in column order, so they bind directly
+            cursor.executemany(self.INSERT_PAPER_SQL, [
+                paper for arxiv_id, paper in unique_papers.items() if arxiv_id not in known_ids
+            ])
+            
+            # Link papers to keyword (ignore if already linked)
+            changes_before = self.conn.total_changes
+            cursor.executemany(self.INSERT_LINK_SQL, [(arxiv_id, keyword_id) for arxiv_id in arxiv_ids])
+            stored_count = self.conn.total_changes - changes_before
             
-            conn.commit()
+            if progress is not None:
+                cursor.execute("""
+                    UPDATE keywords 
+                    SET total_results = ?, processed_results = ?
+                    WHERE id = ?
+                """, (*progress, keyword_id))
+        
+        # Only once the batch has committed; a rolled-back batch must be stored again
+        self.known_ids.update(unique_papers)
         
         return stored_count
     
@@ -243,14 +435,13 @@ class ArxivCollector:
         self.logger.info(f"Processing keyword: '{keyword}'")
         
         # Update keyword status
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
             cursor.execute("""
                 UPDATE keywords 
                 SET status = 'processing', started_at = CURRENT_TIMESTAMP
                 WHERE id = ?
             """, (keyword_id,))
-            conn.commit()
         
         total_processed = 0
         total_stored = 0
@@ -263,7 +454,7 @@ class ArxivCollector:
                     break
                 
                 # Query API
-                papers, api_total_results = self.query_arxiv(
+                papers, arxiv_ids, api_total_results = self.query_arxiv(
                     keyword, start, min(self.batch_size, self.max_results_per_keyword - start)
                 )
                 
@@ -271,44 +462,29 @@ class ArxivCollector:
                     total_results = min(api_total_results, self.max_results_per_keyword)
                     self.logger.info(f"Found {api_total_results} total results for '{keyword}' (processing max {total_results})")
                 
-                # Store papers
-                stored_count = self.store_papers(papers, keyword_id)
-                total_processed += len(papers)
+                # Store papers and record progress in one commit
+                total_processed += len(arxiv_ids)
+                stored_count = self.store_papers(papers, arxiv_ids, keyword_id,
+                                                 progress=(total_results, total_processed))
                 total_stored += stored_count
                 
-                # Update progress
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE keywords 
-                        SET total_results = ?, processed_results = ?
-                        WHERE id = ?
-                    """, (total_results, total_processed, keyword_id))
-                    conn.commit()
-                
-                self.logger.info(f"  Batch {start//self.batch_size + 1}: {len(papers)} papers, {stored_count} new")
+                self.logger.info(f"  '{keyword}' batch {start//self.batch_size + 1}: {len(arxiv_ids)} papers, {stored_count} new")
                 
                 # Check if we got fewer results than requested (end of results)
-                if len(papers) < self.batch_size:
+                if len(arxiv_ids) < self.batch_size:
                     break
                 
-                start += len(papers)
-                
-                # Rate limiting
-                if start < total_results and not self.shutdown_requested:
-                    self.logger.debug(f"Waiting {self.delay} seconds...")
-                    time.sleep(self.delay)
+                start += len(arxiv_ids)
             
             # Mark as completed
             status = 'interrupted' if self.shutdown_requested else 'completed'
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._db_lock, self.conn:
+                cursor = self.conn.cursor()
                 cursor.execute("""
                     UPDATE keywords 
                     SET status = ?, completed_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 """, (status, keyword_id))
-                conn.commit()
             
             result = {
                 'keyword': keyword,
@@ -320,63 +496,132 @@ class ArxivCollector:
             
             self.logger.info(f"Completed '{keyword}': {total_processed} processed, {total_stored} new papers")
             return result
-            
+        
         except Exception as e:
             # Mark as failed
             error_msg = str(e)
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._db_lock, self.conn:
+                cursor = self.conn.cursor()
                 cursor.execute("""
                     UPDATE keywords 
                     SET status = 'failed', error_message = ?, completed_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 """, (error_msg, keyword_id))
-                conn.commit()
             
             self.logger.error(f"Failed processing '{keyword}': {error_msg}")
             raise
     
+    def build_fts_index(self):
+        """(Re)build the full-text index over paper titles and abstracts."""
+        self.logger.info("Building full-text index over stored papers")
+        
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title, abstract,
+                    content='papers', content_rowid='rowid',
+                    tokenize='porter unicode61'
+                )
+            """)
+            cursor.execute("INSERT INTO papers_fts(papers_fts) VALUES('rebuild')")
+    
+    def load_known_ids(self):
+        """Load the IDs of all stored papers into memory."""
+        with self._db_lock:
+            self.known_ids = {row[0] for row in self.conn.execute("SELECT arxiv_id FROM papers")}
+        self.logger.info(f"{len(self.known_ids)} papers already in database")
+    
+    def match_keyword_locally(self, keyword: str, keyword_id: int) -> Dict:
+        """Link a keyword to papers already in the database (e.g. from oai_harvest.py)."""
+        self.logger.info(f"Matching keyword locally: '{keyword}'")
+        
+        # Match the keyword as an FTS5 phrase (stemmed, case-insensitive)
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        
+        try:
+            with self._db_lock, self.conn:
+                cursor = self.conn.cursor()
+                changes_before = self.conn.total_changes
+                cursor.execute("""
+                    INSERT OR IGNORE INTO paper_keywords (paper_id, keyword_id)
+                    SELECT papers.arxiv_id, ? FROM papers_fts
+                    JOIN papers ON papers.rowid = papers_fts.rowid
+                    WHERE papers_fts MATCH ?
+                """, (keyword_id, phrase))
+                total_stored = self.conn.total_changes - changes_before
+                
+                cursor.execute("SELECT COUNT(*) FROM paper_keywords WHERE keyword_id = ?", (keyword_id,))
+                total_results = cursor.fetchone()[0]
+                
+                cursor.execute("""
+                    UPDATE keywords 
+                    SET status = 'completed', total_results = ?, processed_results = ?,
+                        started_at = CURRENT_TIMESTAMP, completed_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (total_results, total_results, keyword_id))
+        
+        except Exception as e:
+            error_msg = str(e)
+            with self._db_lock, self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("""
+                    UPDATE keywords 
+                    SET status = 'failed', error_message = ?, completed_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (error_msg, keyword_id))
+            
+            self.logger.error(f"Failed matching '{keyword}': {error_msg}")
+            raise
+        
+        self.logger.info(f"Completed '{keyword}': {total_results} matching papers, {total_stored} new links")
+        return {
+            'keyword': keyword,
+            'total_results': total_results,
+            'processed': total_results,
+            'stored': total_stored,
+            'status': 'completed'
+        }
+    
     def get_pending_keywords(self) -> List[Tuple[int, str]]:
         """Get list of pending keywords to process."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock:
+            cursor = self.conn.cursor()
             cursor.execute("""
                 SELECT id, keyword FROM keywords 
-                WHERE status IN ('pending', 'failed')
+                WHERE status IN ('pending', 'failed', 'interrupted')
                 ORDER BY id
             """)
             return cursor.fetchall()
     
     def get_progress_summary(self) -> Dict:
         """Get overall progress summary."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db_lock:
+            cursor = self.conn.cursor()
             
-            # Keyword statistics
-            cursor.execute("""
-                SELECT status, COUNT(*) FROM keywords GROUP BY status
-            """)
-            status_counts = dict(cursor.fetchall())
-            
-            # Paper statistics
-            cursor.execute("SELECT COUNT(*) FROM papers")
-            total_papers = cursor.fetchone()[0]
-            
-            cursor.execute("""
-                SELECT COUNT(DISTINCT paper_id) FROM paper_keywords
-            """)
-            linked_papers = cursor.fetchone()[0]
+            # All statistics in one statement: one row per keyword status, each
+            # carrying the paper and processing totals
+            rows = cursor.execute("""
+                WITH k AS (
+                    SELECT status, COUNT(*) AS c FROM keywords GROUP BY status
+                ),
+                totals AS (
+                    SELECT
+                        (SELECT COUNT(*) FROM papers) AS total_papers,
+                        (SELECT COUNT(*) FROM (
+                            SELECT paper_id FROM paper_keywords GROUP BY paper_id
+                        )) AS linked_papers,
+                        COALESCE(SUM(total_results), 0) AS total_found,
+                        COALESCE(SUM(processed_results), 0) AS total_processed
+                    FROM keywords WHERE status != 'pending'
+                )
+                SELECT totals.*, k.status, k.c
+                FROM totals LEFT JOIN k ON 1
+                ORDER BY k.status
+            """).fetchall()
             
-            # Processing statistics
-            cursor.execute("""
-                SELECT 
-                    SUM(total_results) as total_found,
-                    SUM(processed_results) as total_processed
-                FROM keywords WHERE status != 'pending'
-            """)
-            result = cursor.fetchone()
-            total_found = result[0] or 0
-            total_processed = result[1] or 0
+            total_papers, linked_papers, total_found, total_processed = rows[0][:4]
+            status_counts = {status: count for *_, status, count in rows if status is not None}
             
             return {
                 'keywords': status_counts,
@@ -394,48 +639,74 @@ class ArxivCollector:
         """Main execution function."""
         self.logger.info("Starting arXiv paper collection")
         
-        # Load keywords
-        if not resume or not Path(self.db_path).exists():
-            self.load_keywords(keywords_file)
+        # A fresh run bulk-loads into unindexed tables and indexes them at the end
+        if resume:
+            self.create_indexes()
         
-        # Get pending keywords
-        pending_keywords = self.get_pending_keywords()
-        self.logger.info(f"Found {len(pending_keywords)} keywords to process")
-        
-        if not pending_keywords:
-            self.logger.info("No pending keywords found")
-            return
-        
-        # Process keywords
-        start_time = time.time()
-        completed = 0
-        
-        for keyword_id, keyword in pending_keywords:
-            if self.shutdown_requested:
-                break
+        try:
+            # Load keywords
+            if not resume or not Path(self.db_path).exists():
+                self.load_keywords(keywords_file)
             
-            try:
-                result = self.process_keyword(keyword, keyword_id)
-                completed += 1
-                
-                # Progress update
-                elapsed = time.time() - start_time
-                rate = completed / elapsed if elapsed > 0 else 0
-                remaining = len(pending_keywords) - completed
-                eta = remaining / rate if rate > 0 else float('inf')
-                
-                self.logger.info(f"Progress: {completed}/{len(pending_keywords)} keywords "
-                               f"({completed/len(pending_keywords)*100:.1f}%) "
-                               f"ETA: {eta/60:.1f} minutes")
-                
-                # Show summary every 10 keywords
-                if completed % 10 == 0:
-                    summary = self.get_progress_summary()
-                    self.logger.info(f"Summary: {summary['papers']['total_unique']} unique papers collected")
+            # Get pending keywords
+            pending_keywords = self.get_pending_keywords()
+            self.logger.info(f"Found {len(pending_keywords)} keywords to process")
+            
+            if not pending_keywords:
+                self.logger.info("No pending keywords found")
+                return
+            
+            # Process keywords
+            start_time = time.time()
+            completed = 0
+            
+            if self.local:
+                self.build_fts_index()
+            else:
+                self.load_known_ids()
+            process = self.match_keyword_locally if self.local else self.process_keyword
+            
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    executor.submit(process, keyword, keyword_id): keyword
+                    for keyword_id, keyword in pending_keywords
+                }
                 
-            except Exception as e:
-                self.logger.error(f"Failed to process keyword '{keyword}': {e}")
-                continue
+                for future in as_completed(futures):
+                    keyword = futures[future]
+                    if self.shutdown_requested:
+                        # Keywords that have not started yet stay pending
+                        for pending in futures:
+                            pending.cancel()
+                    if future.cancelled():
+                        continue
+                    
+                    try:
+                        result = future.result()
+                        completed += 1
+                        
+                        # Progress update
+                        elapsed = time.time() - start_time
+                        rate = completed / elapsed if elapsed > 0 else 0
+                        remaining = len(pending_keywords) - completed
+                        eta = remaining / rate if rate > 0 else float('inf')
+                        
+                        self.logger.info(f"Progress: {completed}/{len(pending_keywords)} keywords "
+                                       f"({completed/len(pending_keywords)*100:.1f}%) "
+                                       f"ETA: {eta/60:.1f} minutes")
+                        
+                        # Show summary every 10 keywords
+                        if completed % 10 == 0:
+                            summary = self.get_progress_summary()
+                            self.logger.info(f"Summary: {summary['papers']['total_unique']} unique papers collected")
+                    
+                    except Exception as e:
+                        self.logger.error(f"Failed to process keyword '{keyword}': {e}")
+                        continue
+        finally:
+            if not resume:
+                self.logger.info("Creating indexes")
+                self.create_indexes()
         
         # Final summary
         summary = self.get_progress_summary()
@@ -463,6 +734,17 @@ def main():
         default=3.0,
         help="Delay between API requests in seconds (default: 3.0)"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=4,
+        help="Number of keywords processed concurrently (default: 4)"
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Match keywords against papers already in the database (see oai_harvest.py) instead of querying the API"
+    )
     parser.add_argument(
         "--no-resume",
         action="store_true",
@@ -476,7 +758,7 @@ def main():
     
     args = parser.parse_args()
     
-    collector = ArxivCollector(db_path=args.database, delay=args.delay)
+    collector = ArxivCollector(db_path=args.database, delay=args.delay, workers=args.workers, local=args.local)
     
     if args.summary_only:
         summary = collector.get_progress_summary()
@@ -7,40 +7,108 @@ Allows configurable recursion depth and starting synset ID.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
+import io
+import sys
 import json
+import sqlite3
 import argparse
-from typing import Set, List, Dict, Any, Tuple
-from collections import defaultdict, deque
+import functools
+import threading
+from typing import Set, List, Dict, Any, Tuple, TextIO
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+
+def disk_cached(kind: str):
+    """Cache a synset-keyed API call in the explorer's on-disk cache."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, synset_id: str):
+            if not self.refresh:
+                cached = self.cache_get(synset_id, kind)
+                if cached is not None:
+                    return cached
+            
+            result = method(self, synset_id)
+            self.cache_put(synset_id, kind, result)
+            return result
+        return wrapper
+    return decorator
 
 
 class BabelNetHasKindExplorer:
-    def __init__(self, config_file: str = "babelnet_conf.yml"):
+    def __init__(self, config_file: str = "babelnet_conf.yml", workers: int = 16,
+                 cache_file: str = "babelnet_cache.db", refresh: bool = False):
         """Initialize with API key from config file."""
         with open(config_file, 'r') as f:
             config = yaml.safe_load(f)
         self.api_key = config['RESTFUL_KEY']
         self.base_url = "https://babelnet.io/v9"
-        self.cache = {}  # Simple cache to avoid duplicate API calls
+        self.workers = workers  # Concurrent API requests per BFS level
+        
+        # Persistent cache of raw API responses, shared across runs
+        self.refresh = refresh  # Re-fetch everything, overwriting cached entries
+        self.cache_lock = threading.Lock()
+        self.cache_conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.cache_conn.execute("PRAGMA journal_mode=WAL")
+        self.cache_conn.execute("PRAGMA synchronous=NORMAL")
+        self.cache_conn.execute("""
+            CREATE TABLE IF NOT EXISTS synset_cache (
+                id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (id, kind)
+            )
+        """)
+        
+        # Keep-alive session so consecutive calls reuse the TCP/TLS connection
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retries))
+    
+    def cache_get(self, synset_id: str, kind: str) -> Any:
+        """Return a cached API response, or None if not cached."""
+        with self.cache_lock:
+            row = self.cache_conn.execute(
+                "SELECT payload FROM synset_cache WHERE id = ? AND kind = ?", (synset_id, kind)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        return orjson.loads(row[0]) if orjson is not None else json.loads(row[0])
+    
+    def cache_put(self, synset_id: str, kind: str, data: Any):
+        """Store an API response in the cache."""
+        payload = orjson.dumps(data) if orjson is not None else json.dumps(data).encode()
+        with self.cache_lock, self.cache_conn:
+            self.cache_conn.execute(
+                "INSERT OR REPLACE INTO synset_cache (id, kind, payload) VALUES (?, ?, ?)",
+                (synset_id, kind, payload)
+            )
     
+    @disk_cached("synset")
     def get_synset(self, synset_id: str) -> Dict[str, Any]:
         """Retrieve synset details with caching."""
-        if synset_id in self.cache:
-            return self.cache[synset_id]
-        
         url = f"{self.base_url}/getSynset"
         params = {
             "id": synset_id,
             "key": self.api_key
         }
         
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params, timeout=15)
         response.raise_for_status()
         
-        synset_data = response.json()
-        self.cache[synset_id] = synset_data
-        return synset_data
+        return response.json()
     
+    @disk_cached("edges")
     def get_outgoing_edges(self, synset_id: str) -> List[Dict[str, Any]]:
         """Extract outgoing edges for a synset."""
         url = f"{self.base_url}/getOutgoingEdges"
@@ -49,22 +117,16 @@ class BabelNetHasKindExplorer:
             "key": self.api_key
         }
         
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params, timeout=15)
         response.raise_for_status()
         
         return response.json()
     
     def extract_has_kind_relations(self, edges: List[Dict[str, Any]]) -> List[str]:
         """Filter edges for 'has-kind' relations (hyponyms)."""
-        has_kind_targets = []
-        
-        for edge in edges:
-            pointer = edge.get("pointer", {})
-            # Filter for exact "has-kind" relation (hyponymy)
-            if pointer.get("shortName") == "has-kind":
-                has_kind_targets.append(edge["target"])
-        
-        return has_kind_targets
+        # Filter for exact "has-kind" relation (hyponymy)
+        return [edge["target"] for edge in edges
+                if (edge.get("pointer") or {}).get("shortName") == "has-kind"]
     
     def get_synset_label(self, synset_data: Dict[str, Any]) -> str:
         """Extract the best English label for a synset."""
@@ -101,124 +163,137 @@ class BabelNetHasKindExplorer:
         print(f"Starting exploration from: {starting_synset}")
         print(f"Maximum depth: {max_depth}")
         
-        # Results structure
-        exploration_tree = defaultdict(list)
-        visited = set()
-        synset_labels = {}
-        depth_stats = defaultdict(int)
+        # Synset IDs are interned to small ints in discovery order; the interning
+        # table doubles as the visited set. Per-node data lives in flat lists.
+        id_of = {starting_synset: 0}
+        sids = [starting_synset]
+        parents = [-1]      # Parent iid, -1 for the root
+        labels = [None]     # Label once the synset has been fetched
+        depths = [0]
+        processed = []      # iids in processing order
         
-        # BFS queue: (synset_id, current_depth, parent_id)
-        queue = deque([(starting_synset, 0, None)])
-        visited.add(starting_synset)
+        # BFS frontier of iids; all nodes of a level are fetched concurrently
+        frontier = [0]
+        current_depth = 0
         
-        while queue:
-            current_synset, current_depth, parent_id = queue.popleft()
-            
-            if current_depth > max_depth:
-                continue
-            
-            try:
-                print(f"Processing depth {current_depth}: {current_synset}")
-                
-                # Get synset details
-                synset_data = self.get_synset(current_synset)
-                label = self.get_synset_label(synset_data)
-                synset_labels[current_synset] = label
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while frontier and current_depth <= max_depth:
+                # Don't explore further once we've reached max depth
+                expand = current_depth < max_depth
                 
-                # Track statistics
-                depth_stats[current_depth] += 1
+                # Synsets and their edges are independent calls, so request
+                # both at once instead of waiting for one before the other
+                synset_futures = [executor.submit(self.get_synset, sids[iid]) for iid in frontier]
+                edge_futures = [executor.submit(self.get_outgoing_edges, sids[iid]) if expand else None
+                                for iid in frontier]
+                next_frontier = []
                 
-                # Add to tree structure
-                if parent_id:
-                    exploration_tree[parent_id].append({
-                        "synset_id": current_synset,
-                        "label": label,
-                        "depth": current_depth
-                    })
-                else:
-                    # Root node
-                    exploration_tree["root"] = {
-                        "synset_id": current_synset,
-                        "label": label,
-                        "depth": current_depth
-                    }
+                for iid, synset_future, edge_future in zip(frontier, synset_futures, edge_futures):
+                    current_synset = sids[iid]
+                    try:
+                        print(f"Processing depth {current_depth}: {current_synset}")
+                        
+                        # Get synset details
+                        labels[iid] = self.get_synset_label(synset_future.result())
+                        processed.append(iid)
+                        
+                        if not expand:
+                            continue
+                        
+                        # Get outgoing edges and filter for 'has-kind' (hyponyms)
+                        has_kind_targets = self.extract_has_kind_relations(edge_future.result())
+                        
+                        print(f"  Found {len(has_kind_targets)} 'has-kind' relations (hyponyms)")
+                        
+                        # Add unvisited targets to the next level
+                        for target_id in has_kind_targets:
+                            if target_id not in id_of:
+                                target = len(sids)
+                                id_of[target_id] = target
+                                sids.append(target_id)
+                                parents.append(iid)
+                                labels.append(None)
+                                depths.append(current_depth + 1)
+                                next_frontier.append(target)
+                        
+                    except Exception as e:
+                        print(f"Error processing {current_synset}: {e}")
+                        continue
                 
-                # Don't explore further if we've reached max depth
-                if current_depth >= max_depth:
-                    continue
-                
-                # Get outgoing edges and filter for 'has-kind' (hyponyms)
-                edges = self.get_outgoing_edges(current_synset)
-                has_kind_targets = self.extract_has_kind_relations(edges)
-                
-                print(f"  Found {len(has_kind_targets)} 'has-kind' relations (hyponyms)")
-                
-                # Add unvisited targets to queue
-                for target_id in has_kind_targets:
-                    if target_id not in visited:
-                        visited.add(target_id)
-                        queue.append((target_id, current_depth + 1, current_synset))
-                
-            except Exception as e:
-                print(f"Error processing {current_synset}: {e}")
-                continue
+                frontier = next_frontier
+                current_depth += 1
+        
+        # Resolve iids back to synset IDs for the result structure
+        exploration_tree = {}
+        synset_labels = {}
+        depth_stats = defaultdict(int)
+        for iid in processed:
+            node = {
+                "synset_id": sids[iid],
+                "label": labels[iid],
+                "depth": depths[iid]
+            }
+            if parents[iid] >= 0:
+                exploration_tree.setdefault(sids[parents[iid]], []).append(node)
+            else:
+                exploration_tree["root"] = node
+            synset_labels[sids[iid]] = labels[iid]
+            depth_stats[depths[iid]] += 1
         
         return {
             "starting_synset": starting_synset,
             "starting_label": synset_labels.get(starting_synset, "Unknown"),
             "max_depth": max_depth,
-            "exploration_tree": dict(exploration_tree),
+            "exploration_tree": exploration_tree,
             "synset_labels": synset_labels,
             "depth_statistics": dict(depth_stats),
             "total_concepts_found": len(synset_labels)
         }
     
-    def print_exploration_results(self, results: Dict[str, Any]):
-        """Pretty print the exploration results."""
-        print("\n" + "="*60)
-        print("HAS-KIND RELATION EXPLORATION RESULTS (HYPONYMS)")
-        print("="*60)
+    def print_exploration_results(self, results: Dict[str, Any], file: TextIO = None):
+        """Pretty print the exploration results (to stdout unless a file is given)."""
+        out = file or sys.stdout
+        print("\n" + "="*60, file=out)
+        print("HAS-KIND RELATION EXPLORATION RESULTS (HYPONYMS)", file=out)
+        print("="*60, file=out)
         
-        print(f"Starting synset: {results['starting_synset']}")
-        print(f"Starting label: {results['starting_label']}")
-        print(f"Max depth: {results['max_depth']}")
-        print(f"Total concepts found: {results['total_concepts_found']}")
+        print(f"Starting synset: {results['starting_synset']}", file=out)
+        print(f"Starting label: {results['starting_label']}", file=out)
+        print(f"Max depth: {results['max_depth']}", file=out)
+        print(f"Total concepts found: {results['total_concepts_found']}", file=out)
         
-        print("\nDepth Statistics:")
+        print("\nDepth Statistics:", file=out)
         for depth, count in sorted(results['depth_statistics'].items()):
-            print(f"  Depth {depth}: {count} concepts")
+            print(f"  Depth {depth}: {count} concepts", file=out)
         
-        print("\nConcept Tree:")
-        self._print_tree_recursive(results['exploration_tree'], results['synset_labels'], 0)
+        print("\nConcept Tree:", file=out)
+        self._print_tree(results['exploration_tree'], results['synset_labels'], 0, results['max_depth'], out)
     
-    def _print_tree_recursive(self, tree: Dict, labels: Dict, indent_level: int):
-        """Recursively print the tree structure."""
-        indent = "  " * indent_level
+    def _print_tree(self, tree: Dict, labels: Dict, indent_level: int, max_depth: int, file: TextIO = None):
+        """Print the tree structure depth-first using an explicit stack."""
+        if "root" not in tree:
+            return
         
-        if "root" in tree:
-            root = tree["root"]
-            print(f"{indent}• {root['label']} ({root['synset_id']})")
-            
-            # Print children
-            for child in tree.get(root['synset_id'], []):
-                print(f"{indent}  ├─ {child['label']} ({child['synset_id']})")
-                # Recursively print grandchildren
-                self._print_children_recursive(tree, child['synset_id'], labels, indent_level + 2)
-    
-    def _print_children_recursive(self, tree: Dict, parent_id: str, labels: Dict, indent_level: int):
-        """Helper to recursively print children."""
-        indent = "  " * indent_level
-        children = tree.get(parent_id, [])
+        # Lines are collected in memory and written with a single call
+        buf = io.StringIO()
+        indents = ["  " * i for i in range(indent_level + max_depth + 2)]
+        root = tree["root"]
+        buf.write(f"{indents[indent_level]}• {root['label']} ({root['synset_id']})\n")
         
-        for i, child in enumerate(children):
-            is_last = i == len(children) - 1
-            connector = "└─" if is_last else "├─"
-            print(f"{indent}{connector} {child['label']} ({child['synset_id']})")
+        # Stack entries: (child, indent level, connector). Children are pushed
+        # in reverse so they pop, and print, in their original order.
+        stack = [(child, indent_level + 1, "├─") for child in reversed(tree.get(root['synset_id'], []))]
+        
+        while stack:
+            child, level, connector = stack.pop()
+            buf.write(f"{indents[level]}{connector} {child['label']} ({child['synset_id']})\n")
             
-            # Recursively print grandchildren
-            if child['synset_id'] in tree:
-                next_indent = indent_level + 1
-                self._print_children_recursive(tree, child['synset_id'], labels, next_indent)
+            grandchildren = tree.get(child['synset_id'], [])
+            last = len(grandchildren) - 1
+            for i in range(last, -1, -1):
+                stack.append((grandchildren[i], level + 1, "└─" if i == last else "├─"))
+        
+        (file or sys.stdout).write(buf.getvalue())
 
 
 def main():
@@ -240,10 +315,26 @@ def main():
         "--output", "-o",
         help="Output file to save results as JSON"
     )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=16,
+        help="Concurrent API requests per depth level (default: 16)"
+    )
+    parser.add_argument(
+        "--cache",
+        default="babelnet_cache.db",
+        help="SQLite file caching API responses across runs (default: babelnet_cache.db)"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached API responses and fetch everything again"
+    )
     
     args = parser.parse_args()
     
-    explorer = BabelNetHasKindExplorer()
+    explorer = BabelNetHasKindExplorer(workers=args.workers, cache_file=args.cache, refresh=args.refresh)
     
     try:
         results = explorer.explore_has_kind_recursive(
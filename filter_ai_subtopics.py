@@ -3,64 +3,353 @@
 Recursively explore CSO knowledge graph to extract subtopics with configurable depth.
 """
 
-import csv
+import os
 import argparse
 import json
-from collections import defaultdict, deque
+import logging
+import array
+import tempfile
+import zipfile
+from collections import defaultdict
 from typing import Dict, Set, List, Tuple
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Optional speedup; fall back to the pure-Python BFS
+    njit = None
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import breadth_first_order
+except ImportError:  # Only needed for --engine scipy
+    csr_matrix = None
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Predicate field of superTopicOf rows, unquoted and quoted (the CSO dump quotes
+# every field; files written with minimal quoting do not)
+SUPER_TOPIC_OF = b'<http://cso.kmi.open.ac.uk/schema/cso#superTopicOf>'
+SUPER_TOPIC_OF_QUOTED = b'"' + SUPER_TOPIC_OF + b'"'
+
+# Bump when the cached graph layout or topic numbering changes
+CACHE_VERSION = 4
+
+def _tail(uri):
+    """Return the part of a CSO URI after the last '/', without the closing '>'."""
+    # rfind + slice avoids building the intermediate list from split('/')
+    topic = uri[uri.rfind('/') + 1:]
+    return topic[:-1] if topic.endswith('>') else topic
+
 def extract_topic_name(uri):
     """Extract clean topic name from CSO URI."""
-    # Extract the part after the last '/'
-    topic = uri.split('/')[-1].rstrip('>')
     # Replace underscores with spaces
-    return topic.replace('_', ' ')
+    return _tail(uri).replace('_', ' ')
 
 def extract_topic_id(uri):
     """Extract topic ID from CSO URI."""
-    return uri.split('/')[-1].rstrip('>')
+    return _tail(uri)
+
+def _parse_cso_csv(csv_file):
+    """Parse the superTopicOf edges of the CSO CSV into (indptr, indices, topic_ids)."""
+    # Topic numbering, plus the edge list buffered as two flat int arrays;
+    # no per-parent lists are built
+    id_of = {}
+    topic_ids = []
+    edge_parents = array.array('i')
+    edge_children = array.array('i')
+    
+    def intern(uri):
+        topic_id = _tail(uri)
+        number = id_of.get(topic_id)
+        if number is None:
+            number = id_of[topic_id] = len(topic_ids)
+            topic_ids.append(topic_id)
+        return number
+    
+    # Read the file in one go and split rows at the byte level. Subject and
+    # predicate are always quoted URIs with commas percent-encoded; only the
+    # object can contain raw commas (rdfs:label literals such as
+    # "vision, binocular@en ."), and splitting at most twice keeps it in one
+    # piece. So a full CSV parser is not needed, and only the superTopicOf rows
+    # that survive the filter get decoded. splitlines() also handles CRLF files.
+    with open(csv_file, 'rb') as f:
+        data = f.read()
+    
+    for line in data.splitlines():
+        row = line.split(b',', 2)
+        if len(row) != 3:
+            continue
+            
+        subject, predicate, obj = row
+        
+        # Only process superTopicOf relationships; an equality test against the
+        # fixed predicate rejects most rows on the length check alone
+        if predicate == SUPER_TOPIC_OF_QUOTED or predicate == SUPER_TOPIC_OF:
+            # CSO URIs are percent-encoded ASCII, which decodes on a fast path
+            subject = subject.strip(b'"')
+            obj = obj.strip(b'"')
+            try:
+                subject, obj = subject.decode('ascii'), obj.decode('ascii')
+            except UnicodeDecodeError:
+                subject, obj = subject.decode('utf-8'), obj.decode('utf-8')
+            # Record edge: parent -> child
+            edge_parents.append(intern(subject))
+            edge_children.append(intern(obj))
+    
+    n = len(topic_ids)
+    parents = np.frombuffer(edge_parents, np.intc)
+    children = np.frombuffer(edge_children, np.intc)
+    
+    # Drop repeated edges (CSO lists some parent/child pairs more than once),
+    # keeping the first occurrence of each in CSV order
+    _, first = np.unique(parents.astype(np.int64) * n + children, return_index=True)
+    first.sort()
+    parents = parents[first]
+    children = children[first]
+    
+    # Renumber topics in alphabetical order of their names, so sorting topic
+    # numbers sorts names too
+    by_name = np.array(sorted(range(n), key=lambda u: topic_ids[u].replace('_', ' ')), np.int32)
+    renumber = np.empty(n, np.int32)
+    renumber[by_name] = np.arange(n, dtype=np.int32)
+    topic_ids = [topic_ids[old] for old in by_name.tolist()]
+    parents = renumber[parents]
+    children = renumber[children]
+    
+    # Count children per parent, then fill each parent's slice of indices.
+    # A stable sort by parent is that fill, done in C: children keep CSV order.
+    indptr = np.zeros(n + 1, np.int32)
+    np.cumsum(np.bincount(parents, minlength=n), out=indptr[1:])
+    indices = children[np.argsort(parents, kind='stable')]
+    
+    return indptr, indices, topic_ids
+
+def _graph_cache_path(csv_file):
+    """Path of the parsed-graph cache kept next to the CSO CSV."""
+    return os.path.splitext(csv_file)[0] + ".cso.npz"
+
+def _load_cached_graph(csv_file, cache_file):
+    """Return (indptr, indices, topic_ids) from the cache, or None if it is missing or stale."""
+    try:
+        if os.path.getmtime(cache_file) < os.path.getmtime(csv_file):
+            return None
+        with np.load(cache_file) as cache:
+            if int(cache["version"]) != CACHE_VERSION:
+                return None
+            return cache["indptr"], cache["indices"], cache["topic_ids"].tolist()
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # A damaged cache (e.g. from an interrupted write) is rebuilt from the CSV
+        return None
+
+def _save_cached_graph(cache_file, indptr, indices, topic_ids):
+    """Write the parsed graph to the cache; failure to write is not an error."""
+    # Write to a temporary file in the same directory and rename it into place,
+    # so an interrupted write or a concurrent run never leaves a partial cache
+    tmp_file = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_file) or '.', suffix='.tmp',
+                                         delete=False) as f:
+            tmp_file = f.name
+            np.savez(f, version=CACHE_VERSION, indptr=indptr, indices=indices, topic_ids=np.array(topic_ids))
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write graph cache {cache_file}: {e}")
+        if tmp_file is not None and os.path.exists(tmp_file):
+            os.remove(tmp_file)
 
 def load_cso_graph(csv_file="data/CSO.3.4.1.csv"):
-    """Load CSO knowledge graph into memory for efficient querying."""
+    """
+    Load CSO knowledge graph into memory for efficient querying.
+    
+    Topics are numbered 0..n-1 in alphabetical order of name. The super-topic
+    graph (parent -> children) is returned in CSR form: the children of topic u
+    are indices[indptr[u]:indptr[u + 1]]. The parsed graph is cached in a .npz
+    file next to the CSV and reused until the CSV is modified.
+    
+    Returns:
+        Tuple of (indptr, indices, topic_ids, topic_names), where topic_ids and
+        topic_names map a topic number to its ID and human-readable name
+    """
     print("Loading CSO knowledge graph...")
     
-    # Graph structure: topic_id -> list of child topic_ids
-    super_topic_graph = defaultdict(list)
-    topic_names = {}
+    cache_file = _graph_cache_path(csv_file)
+    graph = _load_cached_graph(csv_file, cache_file)
+    if graph is None:
+        graph = _parse_cso_csv(csv_file)
+        _save_cached_graph(cache_file, *graph)
+    indptr, indices, topic_ids = graph
+    
+    # Names are derived once per unique topic rather than once per edge
+    topic_names = [topic_id.replace('_', ' ') for topic_id in topic_ids]
+    
+    print(f"Loaded {np.count_nonzero(np.diff(indptr))} parent topics with {len(indices)} relationships")
+    return indptr, indices, topic_ids, topic_names
+
+def _bfs_python(indptr, indices, start, max_depth, n):
+    """Pure-Python BFS over the CSR graph; same results as _bfs_kernel."""
+    depth = [-1] * n
+    parent = [-1] * n
+    visited = bytearray(n)  # One byte per topic instead of a set of ints
+    
+    # A negative depth excludes even the starting topic
+    if max_depth < 0:
+        return np.empty(0, np.int32), np.array(depth, np.int32), np.array(parent, np.int32)
     
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
+    # BFS queue of topic numbers, preallocated since each topic is enqueued
+    # at most once; head/tail indices replace deque.popleft/append
+    queue = [0] * n
+    queue[0] = start
+    depth[start] = 0
+    visited[start] = 1
+    head = 0
+    tail = 1
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        current_depth = depth[current]
         
-        for row in reader:
-            if len(row) != 3:
-                continue
-                
-            subject, predicate, obj = row
-            
-            # Only process superTopicOf relationships
-            if "superTopicOf" in predicate:
-                parent_id = extract_topic_id(subject)
-                child_id = extract_topic_id(obj)
-                
-                # Build graph: parent -> children
-                super_topic_graph[parent_id].append(child_id)
-                
-                # Store topic names
-                topic_names[parent_id] = extract_topic_name(subject)
-                topic_names[child_id] = extract_topic_name(obj)
-    
-    print(f"Loaded {len(super_topic_graph)} parent topics with {sum(len(children) for children in super_topic_graph.values())} relationships")
-    return super_topic_graph, topic_names
-
-def explore_subtopics_recursive(starting_topic: str, max_depth: int, graph: Dict, topic_names: Dict):
+        # Don't explore further if we've reached max depth; children are only
+        # enqueued when they are within range, so nothing past it is queued
+        if current_depth >= max_depth:
+            continue
+        
+        # Add unvisited children to queue
+        for child in indices[indptr[current]:indptr[current + 1]].tolist():
+            if not visited[child]:
+                visited[child] = 1
+                depth[child] = current_depth + 1
+                parent[child] = current
+                queue[tail] = child
+                tail += 1
+    
+    return np.array(queue[:tail], np.int32), np.array(depth, np.int32), np.array(parent, np.int32)
+
+def _bfs_kernel(indptr, indices, start, max_depth, queue, depth, parent):
+    """
+    BFS over the CSR graph using flat arrays, suitable for Numba compilation.
+    
+    The caller provides the output arrays: queue (length n) receives the visited
+    topic numbers in BFS order, and depth and parent (length n, filled with -1)
+    receive each visited topic's depth and parent number. A depth of -1 marks
+    a topic as unvisited.
+    
+    Returns:
+        Number of topics visited, i.e. the filled length of queue
+    """
+    # A negative depth excludes even the starting topic
+    if max_depth < 0:
+        return 0
+    
+    queue[0] = start
+    depth[start] = 0
+    head = 0
+    tail = 1
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        
+        # Don't explore further if we've reached max depth
+        if depth[current] >= max_depth:
+            continue
+        
+        for k in range(indptr[current], indptr[current + 1]):
+            child = indices[k]
+            if depth[child] < 0:
+                depth[child] = depth[current] + 1
+                parent[child] = current
+                queue[tail] = child
+                tail += 1
+    
+    return tail
+
+# With an explicit signature the kernel is compiled eagerly at import, and
+# cache=True stores the machine code on disk so later runs only load it
+# (warmup.py primes the cache ahead of the first real run)
+BFS_SIGNATURE = "i4(i4[::1], i4[::1], i4, i4, i4[::1], i4[::1], i4[::1])"
+if njit is not None:
+    _bfs_compiled = njit(BFS_SIGNATURE, cache=True, boundscheck=False)(_bfs_kernel)
+
+def _bfs(indptr, indices, start, max_depth, n):
+    """
+    Breadth-first search from topic number start, down to max_depth.
+    
+    Returns:
+        Tuple of (order, depth, parent): the visited topic numbers in BFS order,
+        and each topic's depth and parent number (-1 if unvisited / for the root)
+    """
+    # No topic lies deeper than n, so clamping the depth into int32 range for
+    # the kernel's signature does not change the result
+    max_depth = max(min(max_depth, n), -1)
+    
+    if njit is None:
+        return _bfs_python(indptr, indices, start, max_depth, n)
+    
+    queue = np.empty(n, np.int32)
+    depth = np.full(n, -1, np.int32)
+    parent = np.full(n, -1, np.int32)
+    count = _bfs_compiled(np.ascontiguousarray(indptr, np.int32), np.ascontiguousarray(indices, np.int32),
+                          start, max_depth, queue, depth, parent)
+    return queue[:count], depth, parent
+
+def _bfs_scipy(indptr, indices, start, max_depth, n):
+    """
+    Breadth-first search using SciPy's compiled csgraph traversal.
+    
+    SciPy has no depth limit, so the whole reachable subgraph is traversed and
+    then cut at max_depth. Returns the same (order, depth, parent) as _bfs.
+    """
+    if csr_matrix is None:
+        raise ImportError("scipy is required for --engine scipy")
+    
+    # float64 weights match csgraph's internal dtype; any other dtype is converted,
+    # and the conversion sorts each row, which would change the visiting order
+    graph = csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+    order, predecessors = breadth_first_order(graph, start, directed=True, return_predecessors=True)
+    order = order.astype(np.int32)
+    
+    # Depth follows from the parent's depth; parents precede children in BFS order
+    depth = np.full(n, -1, np.int32)
+    depth_list = depth.tolist()
+    depth_list[start] = 0
+    predecessor_list = predecessors.tolist()
+    for current in order[1:].tolist():
+        depth_list[current] = depth_list[predecessor_list[current]] + 1
+    depth[:] = depth_list
+    
+    # BFS order is sorted by depth, so the topics within range form a prefix;
+    # the depth is clamped as in _bfs so it fits the int32 search
+    order = order[:np.searchsorted(depth[order], max(min(max_depth, n), -1), side='right')]
+    parent = np.full(n, -1, np.int32)
+    parent[order[1:]] = predecessors[order[1:]]
+    within = np.full(n, -1, np.int32)
+    within[order] = depth[order]
+    
+    return order, within, parent
+
+def explore_subtopics_recursive(starting_topic: str, max_depth: int, indptr: np.ndarray, indices: np.ndarray,
+                                topic_ids: List[str], topic_names: List[str], verbose: bool = False,
+                                build_tree: bool = True, engine: str = "numba"):
     """
     Recursively explore subtopics using breadth-first search.
     
     Args:
         starting_topic: Topic ID to start from (e.g., 'artificial_intelligence')
         max_depth: Maximum recursion depth
-        graph: Super-topic graph (parent -> children)
-        topic_names: Mapping of topic IDs to human-readable names
+        indptr, indices: Super-topic graph (parent -> children) in CSR form
+        topic_ids: Topic number -> topic ID
+        topic_names: Topic number -> human-readable name
+        verbose: Log every visited topic at DEBUG level
+        build_tree: Include the nested exploration tree (only needed for JSON output)
+        engine: "numba" for the compiled kernel (pure Python without numba) or "scipy"
         
     Returns:
         Dictionary containing the exploration tree and statistics
@@ -68,71 +357,65 @@ def explore_subtopics_recursive(starting_topic: str, max_depth: int, graph: Dict
     print(f"Starting exploration from: {starting_topic}")
     print(f"Maximum depth: {max_depth}")
     
-    # Results structure
-    exploration_tree = defaultdict(list)
-    visited = set()
-    depth_stats = defaultdict(int)
-    all_subtopics = set()
+    # A topic missing from the graph is explored as an isolated node
+    if starting_topic not in topic_ids:
+        topic_ids = topic_ids + [starting_topic]
+        topic_names = topic_names + [starting_topic]
+        indptr = np.append(indptr, indptr[-1])
+    start = topic_ids.index(starting_topic)
     
-    # BFS queue: (topic_id, current_depth, parent_id)
-    queue = deque([(starting_topic, 0, None)])
-    visited.add(starting_topic)
+    bfs = _bfs_scipy if engine == "scipy" else _bfs
+    order, depth, parent = bfs(indptr, indices, start, max_depth, len(topic_ids))
     
-    while queue:
-        current_topic, current_depth, parent_id = queue.popleft()
-        
-        if current_depth > max_depth:
-            continue
-        
-        # Track statistics
-        depth_stats[current_depth] += 1
-        all_subtopics.add(current_topic)
-        
-        # Get human-readable name
-        topic_name = topic_names.get(current_topic, current_topic)
-        
-        # Add to tree structure
-        if parent_id:
-            exploration_tree[parent_id].append({
-                "topic_id": current_topic,
-                "topic_name": topic_name,
-                "depth": current_depth
-            })
-        else:
-            # Root node
-            exploration_tree["root"] = {
-                "topic_id": current_topic,
-                "topic_name": topic_name,
-                "depth": current_depth
-            }
-        
-        print(f"Depth {current_depth}: {topic_name} ({len(graph.get(current_topic, []))} children)")
-        
-        # Don't explore further if we've reached max depth
-        if current_depth >= max_depth:
-            continue
-        
-        # Get children (subtopics)
-        children = graph.get(current_topic, [])
-        
-        # Add unvisited children to queue
-        for child_id in children:
-            if child_id not in visited:
-                visited.add(child_id)
-                queue.append((child_id, current_depth + 1, current_topic))
+    # Topics at each depth; BFS levels are contiguous, so every depth up to the
+    # deepest one reached has at least one topic
+    depth_stats = {d: int(count) for d, count in enumerate(np.bincount(depth[order]))}
+    
+    # Topic numbers follow name order, so a C-level sort of the visited
+    # numbers lists the subtopics alphabetically
+    all_subtopics = np.unique(order).tolist()
+    
+    if verbose:
+        for current in order.tolist():
+            logger.debug(f"Depth {depth[current]}: {topic_names[current]} ({indptr[current + 1] - indptr[current]} children)")
     
-    return {
+    results = {
         "starting_topic": starting_topic,
-        "starting_name": topic_names.get(starting_topic, starting_topic),
-        "max_depth": max_depth,
-        "exploration_tree": dict(exploration_tree),
-        "depth_statistics": dict(depth_stats),
-        "all_subtopics": list(all_subtopics),
-        "total_topics_found": len(all_subtopics)
+        "starting_name": topic_names[start],
+        "max_depth": max_depth
     }
+    if build_tree:
+        results["exploration_tree"] = _build_tree(order, depth, parent, topic_ids, topic_names)
+    results.update({
+        "depth_statistics": depth_stats,
+        "all_subtopics": [topic_ids[u] for u in all_subtopics],
+        "topic_names": {topic_ids[u]: topic_names[u] for u in all_subtopics},
+        "total_topics_found": len(all_subtopics)
+    })
+    return results
+
+def _build_tree(order, depth, parent, topic_ids, topic_names) -> Dict:
+    """Build the nested exploration tree (parent ID -> child entries) from the BFS arrays."""
+    depth = depth.tolist()
+    parent = parent.tolist()
+    exploration_tree = defaultdict(list)
+    
+    for current in order.tolist():
+        node = {
+            "topic_id": topic_ids[current],
+            "topic_name": topic_names[current],
+            "depth": depth[current]
+        }
+        if parent[current] >= 0:
+            exploration_tree[topic_ids[parent[current]]].append(node)
+        else:
+            # Root node
+            exploration_tree["root"] = node
+    
+    return dict(exploration_tree)
 
-def print_exploration_results(results: Dict):
-    """Pretty print the exploration results."""
+def print_exploration_results(results: Dict) -> List[str]:
+    """Pretty print the exploration results and return the alphabetical subtopic names."""
     print("\n" + "="*60)
     print("CSO SUBTOPIC EXPLORATION RESULTS")
     print("="*60)
@@ -147,28 +430,14 @@ def print_exploration_results(results: Dict):
         print(f"  Depth {depth}: {count} topics")
     
     print("\nAll Subtopics (alphabetical):")
-    subtopic_names = []
-    for topic_id in results['all_subtopics']:
-        # Find the name in the exploration tree
-        name = find_topic_name_in_tree(topic_id, results['exploration_tree'])
-        if name:
-            subtopic_names.append(name)
-    
-    for i, name in enumerate(sorted(set(subtopic_names)), 1):
+    topic_names = results['topic_names']
+    # all_subtopics is already unique and in name order
+    subtopic_names = [topic_names.get(topic_id, topic_id) for topic_id in results['all_subtopics']]
+    
+    for i, name in enumerate(subtopic_names, 1):
         print(f"{i:3d}. {name}")
-
-def find_topic_name_in_tree(topic_id: str, tree: Dict) -> str:
-    """Helper to find topic name in exploration tree."""
-    if "root" in tree and tree["root"]["topic_id"] == topic_id:
-        return tree["root"]["topic_name"]
     
-    for parent_id, children in tree.items():
-        if parent_id == "root":
-            continue
-        for child in children:
-            if child["topic_id"] == topic_id:
-                return child["topic_name"]
-    return topic_id
+    return subtopic_names
 
 def main():
     """Main execution function with command line arguments."""
@@ -194,40 +463,55 @@ def main():
         default="data/CSO.3.4.1.csv",
         help="Path to CSO CSV file (default: data/CSO.3.4.1.csv)"
     )
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="Log every visited topic while exploring"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["numba", "scipy"],
+        default="numba",
+        help="BFS implementation: Numba kernel (pure Python if numba is missing) or SciPy csgraph (default: numba)"
+    )
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(message)s")
     
     try:
         # Load the knowledge graph
-        graph, topic_names = load_cso_graph(args.csv)
+        indptr, indices, topic_ids, topic_names = load_cso_graph(args.csv)
         
         # Explore subtopics
         results = explore_subtopics_recursive(
             starting_topic=args.starting_topic,
             max_depth=args.depth,
-            graph=graph,
-            topic_names=topic_names
+            indptr=indptr,
+            indices=indices,
+            topic_ids=topic_ids,
+            topic_names=topic_names,
+            verbose=args.verbose,
+            build_tree=bool(args.output),
+            engine=args.engine
         )
         
-        print_exploration_results(results)
+        subtopic_names = print_exploration_results(results)
         
         # Save results if output file specified
         if args.output:
-            with open(args.output, "w") as f:
-                json.dump(results, f, indent=2)
+            if orjson is not None:
+                # depth_statistics is keyed by int depth, hence OPT_NON_STR_KEYS
+                with open(args.output, "wb") as f:
+                    f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(args.output, "w") as f:
+                    json.dump(results, f, indent=2)
             print(f"\nResults saved to: {args.output}")
         
         # Also save a simple text list
         output_file = f"subtopics_{args.starting_topic}_depth_{args.depth}.txt"
-        subtopic_names = []
-        for topic_id in results['all_subtopics']:
-            name = find_topic_name_in_tree(topic_id, results['exploration_tree'])
-            if name:
-                subtopic_names.append(name)
-        
         with open(output_file, "w") as f:
-            for name in sorted(set(subtopic_names)):
-                f.write(f"{name}\n")
+            f.write("".join(f"{name}\n" for name in subtopic_names))
         
         print(f"Subtopic list saved to: {output_file}")
         
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+arXiv OAI-PMH Bulk Harvester
+Harvests arXiv metadata in bulk through the OAI-PMH interface into the same SQLite database
+used by arxiv_collector.py. Keywords can then be matched locally with `arxiv_collector.py --local`
+instead of issuing one paginated API query per keyword.
+"""
+
+import argparse
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, List, Optional
+
+from arxiv_collector import ArxivCollector, Paper, dumps_json
+
+
+# OAI-PMH and arXiv metadata namespaces
+OAI_NS = {
+    'oai': 'http://www.openarchives.org/OAI/2.0/',
+    'arXiv': 'http://arxiv.org/OAI/arXiv/'
+}
+OAI_RECORD_TAG = '{http://www.openarchives.org/OAI/2.0/}record'
+OAI_TOKEN_TAG = '{http://www.openarchives.org/OAI/2.0/}resumptionToken'
+OAI_ERROR_TAG = '{http://www.openarchives.org/OAI/2.0/}error'
+
+
+class OAIHarvester(ArxivCollector):
+    """Bulk-load arXiv metadata records into the papers table."""
+    
+    def __init__(self, db_path: str = "arxiv_papers.db", delay: float = 3.0,
+                 base_url: str = "https://oaipmh.arxiv.org/oai"):
+        """Initialize the harvester with database and OAI-PMH endpoint settings."""
+        super().__init__(db_path=db_path, delay=delay, workers=1)
+        self.base_url = base_url
+        self.insert_batch_size = 1000  # Records per transaction
+    
+    def build_list_records_url(self, set_spec: Optional[str] = None, from_date: Optional[str] = None,
+                               until_date: Optional[str] = None, resumption_token: Optional[str] = None) -> str:
+        """Build a ListRecords request URL; a resumption token replaces all other arguments."""
+        if resumption_token:
+            params = {'verb': 'ListRecords', 'resumptionToken': resumption_token}
+        else:
+            params = {'verb': 'ListRecords', 'metadataPrefix': 'arXiv'}
+            if set_spec:
+                params['set'] = set_spec
+            if from_date:
+                params['from'] = from_date
+            if until_date:
+                params['until'] = until_date
+        
+        return f"{self.base_url}?{urllib.parse.urlencode(params)}"
+    
+    def parse_record(self, record: ElementTree.Element) -> Optional[Paper]:
+        """Convert an OAI <record> into a papers row, or None for deleted records."""
+        metadata = record.find('oai:metadata/arXiv:arXiv', OAI_NS)
+        if metadata is None:
+            return None
+        
+        arxiv_id = metadata.findtext('arXiv:id', '', OAI_NS)
+        
+        authors = []
+        for author in metadata.iterfind('arXiv:authors/arXiv:author', OAI_NS):
+            parts = [
+                author.findtext('arXiv:forenames', '', OAI_NS),
+                author.findtext('arXiv:keyname', '', OAI_NS),
+                author.findtext('arXiv:suffix', '', OAI_NS)
+            ]
+            authors.append(' '.join(part for part in parts if part))
+        
+        categories = metadata.findtext('arXiv:categories', '', OAI_NS).split()
+        
+        return Paper(
+            arxiv_id=arxiv_id,
+            title=metadata.findtext('arXiv:title', '', OAI_NS).replace('\n', ' ').strip(),
+            authors=dumps_json(authors),
+            abstract=metadata.findtext('arXiv:abstract', '', OAI_NS).replace('\n', ' ').strip(),
+            categories=dumps_json(categories),
+            published_date=metadata.findtext('arXiv:created', '', OAI_NS),
+            updated_date=metadata.findtext('arXiv:updated', '', OAI_NS),
+            pdf_url=f"https://arxiv.org/pdf/{arxiv_id}",
+            entry_url=f"https://arxiv.org/abs/{arxiv_id}"
+        )
+    
+    def insert_records(self, rows: List[Paper]) -> int:
+        """Insert a batch of papers rows in one transaction; returns the number of new papers."""
+        with self._db_lock, self.conn:
+            changes_before = self.conn.total_changes
+            self.conn.executemany(self.INSERT_PAPER_SQL, rows)
+            return self.conn.total_changes - changes_before
+    
+    def harvest(self, set_spec: Optional[str] = None, from_date: Optional[str] = None,
+                until_date: Optional[str] = None, resumption_token: Optional[str] = None) -> Dict:
+        """Harvest all matching records, following resumption tokens until the list is complete."""
+        self.logger.info(f"Starting OAI-PMH harvest (set={set_spec}, from={from_date}, until={until_date})")
+        
+        total_records = 0
+        total_stored = 0
+        rows = []
+        page = 0
+        
+        try:
+            while not self.shutdown_requested:
+                url = self.build_list_records_url(set_spec, from_date, until_date, resumption_token)
+                resumption_token = None
+                page += 1
+                
+                with self.open_url(url, f"ListRecords page {page}") as response:
+                    for _, element in ElementTree.iterparse(response):
+                        if element.tag == OAI_RECORD_TAG:
+                            row = self.parse_record(element)
+                            if row is not None:
+                                rows.append(row)
+                            element.clear()  # Release the parsed record
+                            
+                            if len(rows) >= self.insert_batch_size:
+                                total_records += len(rows)
+                                total_stored += self.insert_records(rows)
+                                rows = []
+                        elif element.tag == OAI_TOKEN_TAG:
+                            resumption_token = (element.text or '').strip() or None
+                        elif element.tag == OAI_ERROR_TAG:
+                            # An empty selection is reported as an error, not an empty list
+                            if element.get('code') == 'noRecordsMatch':
+                                break
+                            raise Exception(f"OAI-PMH error {element.get('code')}: {element.text}")
+                
+                if rows:
+                    total_records += len(rows)
+                    total_stored += self.insert_records(rows)
+                    rows = []
+                
+                self.logger.info(f"  Page {page}: {total_records} records harvested, {total_stored} new papers")
+                
+                if not resumption_token:
+                    break
+                self.logger.info(f"  Resumption token: {resumption_token}")
+        finally:
+            # Indexes are built once after the bulk insert rather than maintained per row
+            self.create_indexes()
+        
+        status = 'interrupted' if self.shutdown_requested else 'completed'
+        self.logger.info(f"Harvest {status}: {total_records} records, {total_stored} new papers")
+        return {
+            'records': total_records,
+            'stored': total_stored,
+            'status': status
+        }
+
+
+def main():
+    """Main execution function with command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Bulk-harvest arXiv metadata via OAI-PMH into the collector database"
+    )
+    parser.add_argument(
+        "--database", "-d",
+        default="arxiv_papers.db",
+        help="SQLite database path (default: arxiv_papers.db)"
+    )
+    parser.add_argument(
+        "--set", "-s",
+        dest="set_spec",
+        default="cs",
+        help="OAI-PMH set to harvest (default: cs)"
+    )
+    parser.add_argument(
+        "--from",
+        dest="from_date",
+        help="Only harvest records updated on or after this date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--until",
+        dest="until_date",
+        help="Only harvest records updated on or before this date (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--resumption-token",
+        help="Continue an interrupted harvest from a logged resumption token"
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=3.0,
+        help="Delay between requests in seconds (default: 3.0)"
+    )
+    parser.add_argument(
+        "--endpoint",
+        default="https://oaipmh.arxiv.org/oai",
+        help="OAI-PMH base URL (default: https://oaipmh.arxiv.org/oai)"
+    )
+    
+    args = parser.parse_args()
+    
+    harvester = OAIHarvester(db_path=args.database, delay=args.delay, base_url=args.endpoint)
+    
+    try:
+        harvester.harvest(
+            set_spec=args.set_spec,
+            from_date=args.from_date,
+            until_date=args.until_date,
+            resumption_token=args.resumption_token
+        )
+        return 0
+    except KeyboardInterrupt:
+        print("\nHarvest interrupted by user")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
\ No newline at end of file
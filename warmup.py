@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Numba Cache Warmup
+Compiles the CSO breadth-first search kernel of filter_ai_subtopics.py ahead of time, so the
+first real exploration only loads cached machine code instead of paying the compile cost.
+Run once after installing the requirements (and again after upgrading numba).
+"""
+
+import numpy as np
+
+import filter_ai_subtopics
+
+
+def main():
+    """Compile (or load) the cached BFS kernel and check it on a one-topic graph."""
+    if filter_ai_subtopics.njit is None:
+        print("numba is not installed; the pure-Python BFS needs no warmup")
+        return 0
+    
+    # Importing the module already compiled the kernel into the on-disk cache
+    indptr = np.zeros(2, np.int32)
+    indices = np.zeros(0, np.int32)
+    order, _, _ = filter_ai_subtopics._bfs(indptr, indices, 0, 1, 1)
+    
+    print(f"BFS kernel ready ({len(order)} topic visited on the test graph)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
\ No newline at end of file